@@ -1,26 +1,121 @@
-import sys
+import os
+import threading
+import zipfile
 import click
-from qtpy import QtWidgets as qw
-from .gui import MainWindow
-import pyqtgraph as pg
-pg.setConfigOption('imageAxisOrder', 'row-major')
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from importlib.metadata import version as _pkg_version, PackageNotFoundError
+
+@lru_cache(maxsize=1)
+def _get_version():
+    try:
+        return _pkg_version("teepeesee")
+    except PackageNotFoundError:
+        return "unknown"
+
+def _print_version(ctx, param, value):
+    if not value or ctx.resilient_parsing:
+        return
+    click.echo(_get_version())
+    ctx.exit()
+
+class FileArg(click.ParamType):
+    """A file name, optionally prefixed with "name:", taken as given.
+
+    Unlike click.Path() this does not stat() each argument in turn.
+    Existence is instead checked for all files at once in main().
+    """
+    name = "file"
+
+    def shell_complete(self, ctx, param, incomplete):
+        from click.shell_completion import CompletionItem
+        return [CompletionItem(incomplete, type="file")]
 
 @click.command()
-@click.argument('files', nargs=-1, type=click.Path())
-def main(files):
+@click.option('--version', is_flag=True, expose_value=False, is_eager=True,
+              callback=_print_version, help="Show the version and exit.")
+@click.option('--mmap/--no-mmap', default=True,
+              help="Memory-map NPZ arrays instead of reading them whole.  "
+              "Compressed arrays are decompressed once into a cache in "
+              "$XDG_CACHE_HOME/teepeesee (default ~/.cache/teepeesee), "
+              "kept to $TEEPEESEE_CACHE_MB megabytes (default 2048, 0 for "
+              "no cache).")
+@click.option('--opengl/--no-opengl', default=False,
+              help="Render plots through OpenGL (needs working GL drivers).")
+@click.argument('files', nargs=-1, type=FileArg())
+def main(mmap, opengl, files):
     """Display LArTPC detector data from NPZ files.
 
     FILES: One or more NPZ files to display. If none provided, opens with demo data.
     """
+    # Check all files up front.  The stat()s are done concurrently as they
+    # can each be slow on network file systems.
+    filenames = [f.split(':', 1)[-1] for f in files]
+    with ThreadPoolExecutor(32) as ex:
+        found = list(ex.map(os.path.exists, filenames))
+    missing = [f for f, ok in zip(filenames, found) if not ok]
+    if missing:
+        raise click.ClickException(f"no such file(s): {' '.join(missing)}")
+
+    show(list(files) if files else None, mmap, opengl)
+
+def _prefetch(filenames):
+    """Have the OS read the first array of each file into its page cache."""
+    from .sources.npz import NpzFile
+    for filename in filenames:
+        try:
+            with NpzFile(filename) as npz:
+                for key in npz.files:
+                    # Tensor files also hold JSON metadata members.
+                    if key.startswith('frame_') or (key.startswith('tensor_')
+                                                    and key.endswith('_array')):
+                        npz.will_need(key)
+                        break
+        except (OSError, ValueError, zipfile.BadZipFile):
+            pass                # the real load will report any problem
+
+def show(files=None, mmap=True, opengl=False):
+    """Construct the Qt application and main window and run until closed.
+
+    This is the only place Qt is imported and a QApplication constructed.
+    """
+    # Start reading data while Qt initializes and builds the window.  As a
+    # daemon the thread never holds up exit.
+    if files:
+        threading.Thread(target=_prefetch, daemon=True,
+                         args=([f.split(':', 1)[-1] for f in files],)).start()
+
+    # Qt and pyqtgraph are heavy so only import them once we know we will
+    # actually show something (and not for eg --help).
+    import numpy as np
+    from qtpy import QtWidgets as qw
+    import pyqtgraph as pg
+    pg.setConfigOption('imageAxisOrder', 'row-major')
+    pg.setConfigOption('useOpenGL', opengl)
+    try:
+        # Optional, gives pyqtgraph a JIT-compiled image rescale/LUT path.
+        import numba  # noqa: F401
+        pg.setConfigOptions(useNumba=True)
+        # pyqtgraph does not ask numba to cache its kernels so each start
+        # would recompile them.  Turn on numba's on-disk cache for them.
+        from pyqtgraph import functions_numba as fn
+        for kernel in (fn.rescale_and_lookup, fn.rescale_and_clip, fn.numba_take):
+            kernel.enable_caching()
+    except (ImportError, RuntimeError):
+        pass                    # no numba, or no writable cache location
+    from .gui import MainWindow
+
     qw.QApplication.setApplicationName("cueteepeesee")
     qw.QApplication.setOrganizationName("teepeesee")
 
-    # Only pass program name to QApplication to avoid conflicts with click arguments
-    app = qw.QApplication(sys.argv[:1])
-    files_to_open = list(files) if files else None
-    window = MainWindow(initial_files=files_to_open)
+    # Do not pass any arguments to QApplication to avoid conflicts with click's
+    app = qw.QApplication([])
+    if pg.getConfigOption('useNumba'):
+        # Render a tiny image so numba compiles now and not on first display.
+        pg.ImageItem(np.zeros((8, 8), np.float32), levels=(0, 1)).render()
+    window = MainWindow(initial_files=files, mmap=mmap)
     window.show()
-    sys.exit(app.exec())
+    raise SystemExit(app.exec())
 
 if __name__ == "__main__":
     main()
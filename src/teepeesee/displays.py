@@ -1,84 +1,185 @@
+import functools
 from qtpy import QtCore as qc
 from qtpy import QtWidgets as qw
 import pyqtgraph as pg
 import numpy as np
 from . import opers
+from .sources.base import LoadWorker
 
-class FrameTime(pg.PlotWidget):
+# Approximate number of pixels to consider when finding contrast levels or
+# the histogram of the view.
+CONTRAST_SAMPLES = 100_000
+
+
+def clamp(value, lo, hi):
+    """Return value limited to [lo, hi] as int.
+
+    Plain Python, this is much cheaper than np.clip() on a scalar.
+    """
+    return int(lo if value < lo else hi if value > hi else value)
+
+
+def same_arrays(a, b):
+    """Return True if lists a and b hold the very same arrays."""
+    return len(a) == len(b) and all(x is y for x, y in zip(a, b))
+
+
+class TracePlot(pg.PlotWidget):
+    """Base for the 1D trace plots, keeping curves between updates.
+
+    Traces run along the x axis, or along y if along_x is False.  They are
+    drawn as steps or, with half the vertices, as lines.  When more samples
+    than pixels are in view a trace is drawn as the envelope of the min and
+    max of blocks of about one pixel's worth of samples.
+    """
+    along_x = True
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setFixedHeight(80)
+        # PlotWidget sets its PlotItem's clear() on the instance, which would
+        # hide ours and leave self.curves holding removed curves.
+        del self.clear
         self.curves = []  # List of curves for multi-source display
+        self._pens = []   # Pen of each curve
+        self._bins = np.arange(0)
+        self._slices = []  # Traces last drawn
+        self._block = 1    # Samples per envelope block when last drawn
+        self._step = True  # Whether the traces are drawn as steps
+        vb = self.getViewBox()
+        changed = vb.sigXRangeChanged if self.along_x else vb.sigYRangeChanged
+        changed.connect(self._on_range_changed)
+
+    def _reuse_curves(self, pens):
+        """Return one curve per pen, reusing existing curves.
+
+        Only curves that are missing are made and only changed pens set.
+        """
+        while len(self.curves) > len(pens):
+            self.removeItem(self.curves.pop())
+            self._pens.pop()
+        while len(self.curves) < len(pens):
+            pen = pens[len(self.curves)]
+            self.curves.append(self.plot(pen=pen))
+            self._pens.append(pen)
+        for i, pen in enumerate(pens):
+            if self._pens[i] != pen:
+                self.curves[i].setPen(pen)
+                self._pens[i] = pen
+        return self.curves
+
+    def bins(self, n):
+        """Return np.arange(n), reused while n is unchanged.
+
+        The curves hold on to it so it is read-only.
+        """
+        if len(self._bins) != n:
+            self._bins = np.arange(n)
+            self._bins.flags.writeable = False
+        return self._bins
+
+    def _block_size(self):
+        """Return the number of samples per pixel in view, at least 1."""
+        vb = self.getViewBox()
+        lo, hi = vb.viewRange()[0 if self.along_x else 1]
+        pixels = vb.width() if self.along_x else vb.height()
+        if pixels < 1:
+            return 1
+        return max(1, int((hi - lo) / pixels))
+
+    def _envelope(self, data, block):
+        """Return (edges, values) to draw data as steps.
+
+        For block > 1 each block of samples becomes two half-width steps,
+        one at its max and one at its min.
+        """
+        n = len(data)
+        if block < 2:
+            return self.bins(n + 1), data
+        starts = np.arange(0, n, block)
+        values = np.empty(2 * len(starts), dtype=data.dtype)
+        values[0::2] = np.maximum.reduceat(data, starts)
+        values[1::2] = np.minimum.reduceat(data, starts)
+        edges = np.empty(len(values) + 1)
+        edges[0:-1:2] = starts
+        edges[1::2] = np.minimum(starts + block / 2, n)
+        edges[-1] = n
+        return edges, values
+
+    def _set_curve(self, curve, edges, values, step):
+        if step:
+            curve.setData(x=edges, y=values, stepMode="center")
+        else:
+            curve.setData(x=edges[:-1], y=values, stepMode=None)
 
-    def update_trace(self, data_slice):
-        """Update with single data slice (legacy mode)."""
-        # Clear existing curves and create single yellow curve
-        self.clear()
-        self.curves = [self.plot(pen='y', stepMode="center")]
-        bins = np.arange(len(data_slice) + 1)
-        self.curves[0].setData(x=bins, y=data_slice)
+    def draw_traces(self, pens, data_slices, step=True):
+        """Draw each data slice with its pen, as steps or as lines."""
+        self._slices = data_slices
+        self._block = self._block_size()
+        self._step = step
+        for curve, data_slice in zip(self._reuse_curves(pens), data_slices):
+            edges, values = self._envelope(data_slice, self._block)
+            self._set_curve(curve, edges, values, step)
+
+    def _on_range_changed(self):
+        # Zooming changes how many samples share a pixel.
+        if self._slices and self._block_size() != self._block:
+            self.draw_traces(list(self._pens), self._slices, self._step)
 
     def update_multi_trace(self, data_slices):
         """Update with multiple data slices (RGB Multi mode).
 
         data_slices: list of numpy arrays, one per source
+
+        The overlaid traces are drawn as lines, which are easier to tell
+        apart and quicker to draw than steps.
         """
         colors = ['r', 'g', 'b']  # Red, Green, Blue
-        self.clear()
-        self.curves = []
-
-        for i, data_slice in enumerate(data_slices[:3]):  # Max 3 sources
-            if data_slice is not None:
-                color = colors[i] if len(data_slices) > 1 else 'r'  # Single source uses red
-                curve = self.plot(pen=color, stepMode="center")
-                bins = np.arange(len(data_slice) + 1)
-                curve.setData(x=bins, y=data_slice)
-                self.curves.append(curve)
+        data_slices = data_slices[:3]  # Max 3 sources
+        # Single source uses red
+        pens = [colors[i] if len(data_slices) > 1 else 'r'
+                for i, data_slice in enumerate(data_slices) if data_slice is not None]
+        self.draw_traces(pens, [d for d in data_slices if d is not None], step=False)
 
     def clear(self):
         """Clear all plots."""
-        for item in self.items():
-            self.removeItem(item)
+        # Only the curves are ours, leave the plot's own items alone.
+        for curve in self.curves:
+            self.removeItem(curve)
         self.curves = []
+        self._pens = []
+        self._slices = []
+
 
+class FrameTime(TracePlot):
 
-class FrameChan(pg.PlotWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setFixedWidth(100)
-        self.curves = []  # List of curves for multi-source display
+        self.setFixedHeight(80)
 
     def update_trace(self, data_slice):
         """Update with single data slice (legacy mode)."""
-        # Clear existing curves and create single cyan curve
-        self.clear()
-        self.curves = [self.plot(pen='c', stepMode="center")]
-        bins = np.arange(len(data_slice)-1)
-        self.curves[0].setData(x=data_slice, y=bins)
+        # Single yellow curve
+        self.draw_traces(['y'], [data_slice])
 
-    def update_multi_trace(self, data_slices):
-        """Update with multiple data slices (RGB Multi mode).
 
-        data_slices: list of numpy arrays, one per source
-        """
-        colors = ['r', 'g', 'b']  # Red, Green, Blue
-        self.clear()
-        self.curves = []
+class FrameChan(TracePlot):
+    along_x = False
 
-        for i, data_slice in enumerate(data_slices[:3]):  # Max 3 sources
-            if data_slice is not None:
-                color = colors[i] if len(data_slices) > 1 else 'r'  # Single source uses red
-                curve = self.plot(pen=color, stepMode="center")
-                bins = np.arange(len(data_slice)-1)
-                curve.setData(x=data_slice, y=bins)
-                self.curves.append(curve)
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFixedWidth(100)
 
-    def clear(self):
-        """Clear all plots."""
-        for item in self.items():
-            self.removeItem(item)
-        self.curves = []
+    def _set_curve(self, curve, edges, values, step):
+        if step:
+            # Sideways: the values are given as the step edges along x.
+            curve.setData(x=values, y=edges[:len(values) - 1], stepMode="center")
+        else:
+            curve.setData(x=values, y=edges[:-1], stepMode=None)
+
+    def update_trace(self, data_slice):
+        """Update with single data slice (legacy mode)."""
+        # Single cyan curve
+        self.draw_traces(['c'], [data_slice])
 
 
 class FrameInfo(qw.QLabel):
@@ -86,6 +187,7 @@ class FrameInfo(qw.QLabel):
         super().__init__(parent)
         self.setStyleSheet("background-color: rgba(0, 0, 0, 180); color: #00FF00; font-family: monospace; font-weight: bold; padding: 5px; border: 1px solid #555; border-radius: 4px;")
         self.setAttribute(qc.Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self._text = ""  # as last set
 
     def update_info(self, x, y, value, tickinfo=None):
         v_str = f"{value:.2f}" if isinstance(value, (float, np.float32)) else str(value)
@@ -97,8 +199,12 @@ class FrameInfo(qw.QLabel):
             current_t = start + dt
             text += f"T: {start*1e-6:,.1f} + {dt*1e-6:,.1f} = {current_t*1e-6:,.1f} ms @ {period} ns"
         #print(f'FrameInfo: {text}')
-        self.setText(text)
-        self.adjustSize()
+        last, self._text = self._text, text
+        if text != last:
+            self.setText(text)
+            # The font is monospace so the size only changes with the length.
+            if len(text) != len(last):
+                self.adjustSize()
 
 
 class FrameImage(pg.PlotWidget):
@@ -106,14 +212,23 @@ class FrameImage(pg.PlotWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.image_item = pg.ImageItem()
+        # Frames have many more samples than screen pixels, only render as
+        # many as are shown.
+        self.image_item.setAutoDownsample(True)
         self.addItem(self.image_item)
         self.v_line = pg.InfiniteLine(angle=90, movable=True, pen='r')
         self.h_line = pg.InfiniteLine(angle=0, movable=True, pen='r')
         self.addItem(self.v_line, ignoreBounds=True)
         self.addItem(self.h_line, ignoreBounds=True)
         self.info_box = FrameInfo(self)
-        self.v_line.sigDragged.connect(self.emit_selection)
-        self.h_line.sigDragged.connect(self.emit_selection)
+        # Drags move the lines at every mouse event, emit at most one
+        # selection per frame (~60 Hz) for them.
+        self._drag_timer = qc.QTimer(self)
+        self._drag_timer.setSingleShot(True)
+        self._drag_timer.setInterval(16)
+        self._drag_timer.timeout.connect(self.emit_selection)
+        self.v_line.sigDragged.connect(self._on_line_dragged)
+        self.h_line.sigDragged.connect(self._on_line_dragged)
         self.scene().sigMouseClicked.connect(self.handle_click)
         # Set initial range to reasonable values instead of pyqtgraph's default (-1, 1)
         # This will be overridden by reset_to_default_view() once data is loaded
@@ -123,9 +238,13 @@ class FrameImage(pg.PlotWidget):
         self.showGrid(x=state, y=state, alpha=0.3)
 
     def set_lines(self, x, y):
+        # Moving the lines schedules repainting only the area they cover.
         self.v_line.setValue(x)
         self.h_line.setValue(y)
-        self.getViewBox().update()
+
+    def _on_line_dragged(self):
+        if not self._drag_timer.isActive():
+            self._drag_timer.start()
 
     def emit_selection(self):
         self.selectionChanged.emit(int(self.v_line.value()),
@@ -146,29 +265,55 @@ class FrameDisplay(qw.QWidget):
         self.source_data = []  # List of source data arrays (even if single source)
         self.pipeline = []  # List of operation instances to apply
         self.display_data = []  # Result of applying pipeline to source_data
+        # Maps tuple of op names to their result.  Replaced, not cleared, on
+        # new data as worker jobs in flight hold on to the one they fill.
+        self._pipeline_cache = {}
+        # Maps tuple of op names to the (image, range) shown of their result,
+        # see _run_pipeline().  Replaced along with _pipeline_cache.
+        self._image_cache = {}
         self._rgb_multi_mode = False  # Whether to combine sources into RGB composite
+        self._mono_levels = None  # levels to restore on leaving RGB multi mode
         self._is_syncing = False
         self._user_has_zoomed = False
         self._programmatic_range_change = False
+        self._hist_range = None  # (min, max) of the displayed image
+        self._hist_edges = None  # (_hist_range, histogram bin edges)
+        self._rgb_buffer = None  # reused by _create_rgb_composite()
+        self._rgb_sources = []  # arrays last composited into _rgb_buffer
+        self._transposed = {}  # id(array) -> C-ordered transpose, see _column()
+        self._shown_at = None  # (col, row) the info and traces show
+        self._batch_depth = 0  # > 0 while between beginBatch() and endBatch()
+        self._batch_dirty = False  # pipeline to apply at endBatch()
+        # Operations run on a worker thread, see _apply_pipeline().
+        self._pipeline_worker = LoadWorker()
+        self._pipeline_worker.done.connect(self._show_pipeline_result)
+        self._pipeline_job = None  # token of the result still to be shown
+        self._shown_job = None  # token of the result shown
+        self._deferred = []  # view updates waiting for that result
         layout = qw.QGridLayout(self)
         layout.setContentsMargins(2, 2, 2, 2)
         self.f_image = FrameImage()
-        self.f_time = FrameTime()
-        self.f_chan = FrameChan()
+        # The time and channel plots are made by _side_plots() once there is
+        # a selection to show.  Until then their space is kept empty.
+        self.f_time = None
+        self.f_chan = None
         self.f_hist = pg.HistogramLUTWidget()
         self.f_hist.setFixedWidth(100)
         self.f_hist.setImageItem(self.f_image.image_item)
         layout.addWidget(self.f_hist, 0, 0)
         layout.addWidget(self.f_image, 0, 1)
-        layout.addWidget(self.f_chan, 0, 2)
-        layout.addWidget(self.f_time, 1, 1)
+        layout.setColumnMinimumWidth(2, 100)
+        layout.setRowMinimumHeight(1, 80)
         layout.setColumnStretch(1, 10)
         layout.setRowStretch(0, 10)
-        self.f_time.setXLink(self.f_image)
-        self.f_chan.setYLink(self.f_image)
         self.f_image.selectionChanged.connect(self._on_internal_change)
         self.f_image.getViewBox().sigRangeChanged.connect(self._on_range_changed)
-        self.f_image.getViewBox().sigRangeChanged.connect(self.update_hist_region)
+        # Range changes arrive in bursts while panning or zooming so coalesce
+        # them into a single histogram update once they pause.
+        self._hist_timer = qc.QTimer(self)
+        self._hist_timer.setSingleShot(True)
+        self._hist_timer.setInterval(50)
+        self._hist_timer.timeout.connect(self.update_hist_region)
 
     def enterEvent(self, event):
         "Automatically grab focus when mouse enters, enabling arrow key nudging."
@@ -228,32 +373,139 @@ class FrameDisplay(qw.QWidget):
         """
         return any(op.__class__.__name__ == operation_name for op in self.pipeline)
 
+    def beginBatch(self):
+        """Defer applying the pipeline until the matching endBatch().
+
+        Use around several data or pipeline changes so they are shown once.
+        """
+        self._batch_depth += 1
+
+    def endBatch(self):
+        """End a batch, applying the pipeline if anything changed in it."""
+        self._batch_depth -= 1
+        if self._batch_depth == 0 and self._batch_dirty:
+            self._batch_dirty = False
+            self._apply_pipeline()
+
     def _apply_pipeline(self):
-        """Apply all operations in pipeline to source data and update display."""
+        """Apply all operations in pipeline to source data and update display.
+
+        Operations that must be run, rather than taken from the cache, are run
+        on a worker thread so the GUI stays responsive.  The display is then
+        updated once they finish, unless a later change superseded them.
+        """
+        if self._batch_depth:
+            self._batch_dirty = True
+            return
         if not self.source_data:
+            self._pipeline_job = None
             self.display_data = []
             return
 
-        # Start with source data
-        self.display_data = self.source_data.copy()
+        names = tuple(op.__class__.__name__ for op in self.pipeline)
+        shown = self._shown_job
+        if (self._pipeline_job is None and shown is not None
+            and shown[1:] == (names, self._rgb_multi_mode)
+            and same_arrays(shown[0], self.source_data)):
+            return              # eg the same data sent again for a new colormap
+
+        # The token identifies what the result is of.
+        job = self._pipeline_job = (self.source_data, names, self._rgb_multi_mode)
+        run = functools.partial(self._run_pipeline, job, self.source_data.copy(),
+                                list(self.pipeline), self._pipeline_cache,
+                                self._image_cache)
+        if ((not names or names in self._pipeline_cache)
+            and (self._rgb_multi_mode or names in self._image_cache)):
+            self._show_pipeline_result(run())
+        else:
+            self._pipeline_worker.request(run)
+
+    @staticmethod
+    def _run_pipeline(job, data, pipeline, cache, images):
+        """Return [job, data, image, range] with the pipeline applied to data.
 
-        # Apply each operation in sequence
-        for operation in self.pipeline:
-            self.display_data = operation(self.display_data)
+        Results of each leading part of the pipeline are kept in cache until
+        the source data changes so that toggling an operation does not
+        recompute those before it.  data is None if an operation failed.
 
-        # Update the display with transformed data
-        self._update_display()
+        Outside RGB multi mode image is data[0] as shown and range its
+        (nanmin, nanmax), or None if it is empty.  They are found here, off
+        the GUI thread, and kept in images.
+        """
+        names = ()
+        try:
+            for operation in pipeline:
+                names += (operation.__class__.__name__,)
+                cached = cache.get(names)
+                if cached is None:
+                    cached = cache[names] = operation(data)
+                data = cached
+        except Exception as e:
+            print(f"Error applying {names[-1]}: {e}")
+            return [job, None, None, None]
+        rgb_multi_mode = job[2]
+        if rgb_multi_mode or not data:
+            return [job, data, None, None]
+        shown = images.get(names)
+        if shown is None:
+            image = data[0]
+            if image.dtype == np.float64:
+                # Eg rebaselined integer samples.  Single precision is far
+                # more than the colour map resolves and halves the bytes
+                # each render, histogram and contrast pass reads.
+                image = image.astype(np.float32)
+            image_range = None
+            if image.size:
+                image_range = (float(np.nanmin(image)), float(np.nanmax(image)))
+            shown = images[names] = (image, image_range)
+        return [job, data, *shown]
+
+    def _show_pipeline_result(self, result):
+        job, display_data, image, image_range = result
+        if job is not self._pipeline_job:
+            return              # superseded
+        self._pipeline_job = None
+        if display_data is not None:
+            self._shown_job = job
+            self.display_data = display_data
+            self._hist_range = image_range
+            self._update_display(image)
+        deferred, self._deferred = self._deferred, []
+        for update in deferred:
+            update()
+
+    def _defer_until_shown(self, update):
+        """Return True if update is deferred until pending data is shown."""
+        if self._pipeline_job is None:
+            return False
+        if update not in self._deferred:
+            self._deferred.append(update)
+        return True
 
     @qc.Slot(np.ndarray)
     def updateData(self, samples=None, channels=None, tickinfo=None):
         """Update with single source data."""
         self.current_channels = channels
         self.current_tickinfo = tickinfo
-        self.source_data = [samples] if samples is not None else []
+        self._set_source_data([samples] if samples is not None else [])
         self._apply_pipeline()
 
+    def _set_source_data(self, source_data):
+        """Set the source data, keeping cached results if it is unchanged."""
+        if not same_arrays(source_data, self.source_data):
+            self._pipeline_cache = {}
+            self._image_cache = {}
+        self.source_data = source_data
+
     def set_rgb_multi_mode(self, enabled):
         """Enable or disable RGB multi mode."""
+        # The composite is shown with [0, 1] levels, which also move the
+        # histogram region, so keep the image's levels to return to.
+        if enabled and not self._rgb_multi_mode:
+            self._mono_levels = self.f_hist.getLevels()
+        elif not enabled and self._rgb_multi_mode and self._mono_levels:
+            self.f_hist.setLevels(*self._mono_levels)
+            self._mono_levels = None
         self._rgb_multi_mode = enabled
         # Add/remove UnitNorm operation based on RGB multi mode
         if enabled and not self.has_operation('UnitNorm'):
@@ -266,12 +518,13 @@ class FrameDisplay(qw.QWidget):
 
         data_list: list of dicts with 'samples', 'channels', 'tickinfo' keys
         """
-        self.source_data = []
+        source_data = []
 
         for data_dict in data_list[:3]:  # Max 3 sources
             samples = data_dict.get('samples')
             if samples is not None:
-                self.source_data.append(samples)
+                source_data.append(samples)
+        self._set_source_data(source_data)
 
         # Use first source's metadata for display
         if data_list:
@@ -284,11 +537,31 @@ class FrameDisplay(qw.QWidget):
         """Clear the display, showing no data."""
         self.source_data = []
         self.display_data = []
+        self._pipeline_cache = {}
+        self._image_cache = {}
+        self._pipeline_job = None
+        self._shown_job = None
+        self._deferred = []
+        self._hist_range = None
         self.current_channels = None
         self.current_tickinfo = None
+        self._transposed.clear()
+        self._shown_at = None
         self.f_image.image_item.clear()
-        self.f_time.clear()
-        self.f_chan.clear()
+        if self.f_time is not None:
+            self.f_time.clear()
+            self.f_chan.clear()
+
+    def _side_plots(self):
+        """Return the time and channel plots, making them on first use."""
+        if self.f_time is None:
+            self.f_time = FrameTime()
+            self.f_chan = FrameChan()
+            self.layout().addWidget(self.f_chan, 0, 2)
+            self.layout().addWidget(self.f_time, 1, 1)
+            self.f_time.setXLink(self.f_image)
+            self.f_chan.setYLink(self.f_image)
+        return self.f_time, self.f_chan
 
     def _create_rgb_composite(self):
         """Create RGB composite image from multiple sources.
@@ -301,36 +574,80 @@ class FrameDisplay(qw.QWidget):
         # Get the shape from first source
         h, w = self.display_data[0].shape
 
-        # Create RGB image (height, width, 3)
-        rgb_image = np.zeros((h, w, 3), dtype=np.float32)
+        # RGB image (height, width, 3), reused while the shape is unchanged.
+        rgb_image = self._rgb_buffer
+        if rgb_image is None or rgb_image.shape[:2] != (h, w):
+            rgb_image = self._rgb_buffer = np.zeros((h, w, 3), dtype=np.float32)
+            self._rgb_sources = []
 
         # Assign sources to R, G, B channels
         # Single source: Red only
         # Two sources: Red and Green
         # Three+ sources: Red, Green, Blue
-        for i, data in enumerate(self.display_data[:3]):
+        sources = self.display_data[:3]
+        if same_arrays(sources, self._rgb_sources):
+            return rgb_image    # already holds these, eg from the cache
+        for i, data in enumerate(sources):
             rgb_image[:, :, i] = data
+        # Channels past the sources are zero unless there were more before.
+        rgb_image[:, :, len(sources):len(self._rgb_sources)] = 0
+        self._rgb_sources = sources
 
         return rgb_image
 
-    def _update_display(self):
-        """Update the display with transformed data from the pipeline."""
+    def _column(self, data, c):
+        """Return column c of a displayed array.
+
+        Each update reads one column, which is gathered directly.  Further
+        reads of the same array, as when the crosshair is moved, come from a
+        C-ordered transpose made at the second read.  Its rows are contiguous
+        rather than a strided pass over every row of data.
+        """
+        columns = self._transposed.get(id(data))
+        if columns is None:
+            self._transposed[id(data)] = False     # read once
+            return data[:, c]
+        if columns is False:
+            columns = self._transposed[id(data)] = np.ascontiguousarray(data.T)
+        return columns[c]
+
+    def _update_display(self, image=None):
+        """Update the display with transformed data from the pipeline.
+
+        Outside RGB multi mode the image shown is given, its range already
+        in _hist_range.
+        """
+        self._transposed.clear()
+        self._shown_at = None
         if self._rgb_multi_mode and len(self.display_data) > 0:
             # RGB multi mode: combine multiple sources into RGB composite
             rgb_image = self._create_rgb_composite()
             if rgb_image is not None:
-                self.f_image.image_item.setImage(rgb_image, autoLevels=False)
+                # UnitNorm gives [0, 1], not the levels of the mono image.
+                self.f_image.image_item.setImage(rgb_image, levels=(0, 1))
                 self.f_image.emit_selection()
                 # Histogram doesn't apply in RGB mode
-        elif len(self.display_data) > 0:
+        elif image is not None:
             # Normal single-source mode: display first source
-            self.f_image.image_item.setImage(self.display_data[0], autoLevels=False)
+            # The histogram is drawn by update_hist_region(), so spare the
+            # HistogramLUTItem making its own of every new frame.
+            with pg.SignalBlock(self.f_image.image_item.sigImageChanged,
+                                self.f_hist.item.imageChanged):
+                self.f_image.image_item.setImage(image, autoLevels=False)
             self.f_image.emit_selection()
-            self.update_hist_region()
+            # Coalesced with the range change of any following view reset.
+            self._hist_timer.start()
+
+    def _view_bounds(self, data):
+        """Return (x0, x1, y0, y1), the part of data in view."""
+        rect = self.f_image.getViewBox().viewRect()
+        h, w = data.shape
+        return (clamp(rect.left(), 0, w), clamp(rect.right(), 0, w),
+                clamp(rect.top(), 0, h), clamp(rect.bottom(), 0, h))
 
     def auto_contrast(self):
         # Skip auto contrast in RGB Multi mode (image is already normalized)
-        if self._rgb_multi_mode:
+        if self._rgb_multi_mode or self._defer_until_shown(self.auto_contrast):
             return
 
         data = self.f_image.image_item.image
@@ -341,15 +658,19 @@ class FrameDisplay(qw.QWidget):
         if len(data.shape) == 3:
             return
 
-        vb = self.f_image.getViewBox()
-        rect = vb.viewRect()
+        x0, x1, y0, y1 = self._view_bounds(data)
         h, w = data.shape
-        x0, x1 = int(np.clip(rect.left(), 0, w)), int(np.clip(rect.right(), 0, w))
-        y0, y1 = int(np.clip(rect.top(), 0, h)), int(np.clip(rect.bottom(), 0, h))
-        if (x1 - x0) < 2 or (y1 - y0) < 2:
-            mn, mx = np.nanmin(data), np.nanmax(data)
+        if (x0, x1, y0, y1) == (0, w, 0, h) or (x1 - x0) < 2 or (y1 - y0) < 2:
+            # The exact range of the whole image is already known.  Unlike a
+            # subsample it keeps single pixel peaks and thin tracks.
+            if self._hist_range is None:
+                return          # empty
+            mn, mx = self._hist_range
         else:
-            v_slice = data[y0:y1, x0:x1]
+            # Levels from a strided subsample of a large zoomed-in view are
+            # visually the same and much cheaper to find.
+            step = max(1, int(np.sqrt((x1 - x0) * (y1 - y0) / CONTRAST_SAMPLES)))
+            v_slice = data[y0:y1:step, x0:x1:step]
             mn, mx = np.nanmin(v_slice), np.nanmax(v_slice)
         if mn == mx:
             mx = mn + 1.0
@@ -369,14 +690,28 @@ class FrameDisplay(qw.QWidget):
         if len(data.shape) == 3:
             return
 
-        vb = self.f_image.getViewBox()
-        rect = vb.viewRect()
-        h, w = data.shape
-        x0, x1 = int(np.clip(rect.left(), 0, w)), int(np.clip(rect.right(), 0, w))
-        y0, y1 = int(np.clip(rect.top(), 0, h)), int(np.clip(rect.bottom(), 0, h))
+        x0, x1, y0, y1 = self._view_bounds(data)
+
+        if self._hist_range is None:
+            return
+        mn, mx = self._hist_range
+        if not mn <= mx:        # all NaN
+            return
 
         if x1 > x0 and y1 > y0:
-            hist, bins = np.histogram(data[y0:y1, x0:x1], bins='auto')
+            # Fixed bins over the range of the whole image save numpy from
+            # estimating bins from the data.  Given as edges, kept while the
+            # range is unchanged, numpy bins about twice as fast as from a
+            # number of bins and a range.
+            if self._hist_edges is None or self._hist_edges[0] != (mn, mx):
+                # Widen an empty range as np.histogram does.
+                lo, hi = (mn - 0.5, mx + 0.5) if mn == mx else (mn, mx)
+                self._hist_edges = ((mn, mx), np.linspace(lo, hi, 257))
+            edges = self._hist_edges[1]
+            # As for contrast, a strided subsample of a large view gives the
+            # same shape.
+            step = max(1, int(np.sqrt((x1 - x0) * (y1 - y0) / CONTRAST_SAMPLES)))
+            hist, bins = np.histogram(data[y0:y1:step, x0:x1:step], bins=edges)
             # When using "center" we must make sure x is one larger than y.  We
             # can do that here but the stepMode is "sticky" and later when we
             # update the image, this method does not get run but instead
@@ -393,33 +728,41 @@ class FrameDisplay(qw.QWidget):
 
     def _on_internal_change(self, col, row):
         data = self.f_image.image_item.image
-        if data is not None:
-            if self._rgb_multi_mode and len(self.display_data) > 0:
-                # RGB multi mode: extract slices from individual sources
-                h, w = self.display_data[0].shape
-                c, r = int(np.clip(col, 0, w - 1)), int(np.clip(row, 0, h - 1))
-
-                # Update info box with first source's value
-                self.f_image.info_box.update_info(c, r, self.display_data[0][r, c],
-                                                  getattr(self, "current_tickinfo", None))
-
-                # Extract slices from all sources for 1D plots
-                time_slices = [d[r, :] for d in self.display_data]
-                chan_slices = [d[:, c] for d in self.display_data]
-
-                self.f_time.update_multi_trace(time_slices)
-                self.f_chan.update_multi_trace(chan_slices)
-            else:
-                # Normal single-source mode
-                h, w = data.shape
-                c, r = int(np.clip(col, 0, w - 1)), int(np.clip(row, 0, h - 1))
-                self.f_image.info_box.update_info(c, r, data[r, c],
-                                                  getattr(self, "current_tickinfo", None))
-                self.f_time.update_trace(data[r, :])
-                self.f_chan.update_trace(data[:, c])
+        if data is None or not data.size:
+            return
+        h, w = data.shape[:2]
+        c, r = clamp(col, 0, w - 1), clamp(row, 0, h - 1)
+        # A repeat, eg a key held at the edge of the image, needs no redraw
+        # but is still passed on so that the other displays follow it.
+        if self._shown_at != (c, r):
+            self._shown_at = (c, r)
+            self._show_selection(data, c, r)
         if not self._is_syncing:
             self.userSelectionChanged.emit(col, row)
 
+    def _show_selection(self, data, c, r):
+        """Show the value and traces through column c and row r of data."""
+        if self._rgb_multi_mode and len(self.display_data) > 0:
+            # RGB multi mode: extract slices from individual sources
+            # Update info box with first source's value
+            self.f_image.info_box.update_info(c, r, self.display_data[0][r, c],
+                                              getattr(self, "current_tickinfo", None))
+
+            # Extract slices from all sources for 1D plots
+            time_slices = [d[r, :] for d in self.display_data]
+            chan_slices = [self._column(d, c) for d in self.display_data]
+
+            f_time, f_chan = self._side_plots()
+            f_time.update_multi_trace(time_slices)
+            f_chan.update_multi_trace(chan_slices)
+        else:
+            # Normal single-source mode
+            self.f_image.info_box.update_info(c, r, data[r, c],
+                                              getattr(self, "current_tickinfo", None))
+            f_time, f_chan = self._side_plots()
+            f_time.update_trace(data[r, :])
+            f_chan.update_trace(self._column(data, c))
+
     def set_crosshair(self, x, y):
         self.f_image.set_lines(x, y)
         self._on_internal_change(x, y)
@@ -429,16 +772,19 @@ class FrameDisplay(qw.QWidget):
         """Set only the vertical crosshair (x position), keeping horizontal independent."""
         y = int(self.f_image.h_line.value())
         self.f_image.v_line.setValue(x)
-        self.f_image.getViewBox().update()
         self._on_internal_change(x, y)
 
     def _on_range_changed(self):
         """Track when user manually changes the view range."""
         if not self._programmatic_range_change:
             self._user_has_zoomed = True
+        # The histogram follows the view once it settles.
+        self._hist_timer.start()
 
     def reset_to_default_view(self):
         """Reset view with X-axis starting at 0 on the left."""
+        if self._defer_until_shown(self.reset_to_default_view):
+            return
         data = self.f_image.image_item.image
         if data is not None:
             h, w = data.shape
@@ -15,11 +15,12 @@ SEISMIC_STOPS = {
 }
 
 class MainWindow(qw.QMainWindow):
-    def __init__(self, initial_files=None):
+    def __init__(self, initial_files=None, mmap=True):
         super().__init__()
         self.setWindowTitle("Data Stack Analyzer")
         self.resize(1300, 950)
         self.source_manager = SourceManager()
+        self.mmap = mmap
         self.displays = []
         self.shapes = [(800, 1500), (800, 1500), (960, 1500)]
 
@@ -117,7 +118,8 @@ class MainWindow(qw.QMainWindow):
     def open_file_dialog(self):
         files, _ = qw.QFileDialog.getOpenFileNames(self, "Open Data Files", "", "Numpy Zipped (*.npz)")
         if files:
-            self.load_file_source(files)
+            # Let the dialog close and the window repaint before parsing.
+            qc.QTimer.singleShot(0, lambda: self.load_file_source(files))
 
     def _load_initial_files(self, initial_files):
         """Parse initial_files and load them as sources.
@@ -149,15 +151,14 @@ class MainWindow(qw.QMainWindow):
             self.load_file_source([filename])
 
     def load_file_source(self, filenames, name=None):
-        source = FileSource(filenames, self.source_manager.index, name)
+        source = FileSource(filenames, self.source_manager.index, name, self.mmap)
         self.source_manager.add_source(source)
-        if source._delegate:
-            source._delegate._generate()
+        qc.QTimer.singleShot(0, source._generate)
 
     def init_random_source(self):
         source = RandomDataSource(self.shapes, self.source_manager.index)
         self.source_manager.add_source(source)
-        source._generate()
+        qc.QTimer.singleShot(0, source._generate)
 
     def _connect_source_manager(self):
         """Connect the source_manager to UI elements."""
@@ -228,6 +229,8 @@ class MainWindow(qw.QMainWindow):
         # Check if we're in RGB Multi mode
         rgb_multi_mode = any(d._rgb_multi_mode for d in self.displays)
 
+        for d in self.displays:
+            d.beginBatch()
         if rgb_multi_mode:
             # RGB Multi mode: get data from all sources
             self._redistribute_for_rgb_multi()
@@ -241,6 +244,8 @@ class MainWindow(qw.QMainWindow):
             # Clear displays that don't have data in this source
             for i in range(len(data), len(self.displays)):
                 self.displays[i].clear()
+        for d in self.displays:
+            d.endBatch()
 
         # Reset view only if no display has been manually zoomed by user
         if not any(d._user_has_zoomed for d in self.displays):
@@ -272,6 +277,9 @@ class MainWindow(qw.QMainWindow):
         [d.auto_contrast() for d in self.displays]
 
     def set_cmap(self, p):
+        # Apply the mode's pipeline change and its new data together.
+        for d in self.displays:
+            d.beginBatch()
         if p == 'rgb_multi':
             # Enable RGB Multi mode
             for d in self.displays:
@@ -289,6 +297,8 @@ class MainWindow(qw.QMainWindow):
                 d.f_hist.regionChanged()
             # Re-distribute data in normal mode
             self._redistribute_normal()
+        for d in self.displays:
+            d.endBatch()
 
     def _make_cmap_handler(self, p):
         return lambda: self.set_cmap(p)
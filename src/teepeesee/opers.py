@@ -24,8 +24,23 @@ class Rebaseline:
         return self._rebaseline_single(data)
 
     def _rebaseline_single(self, samples):
-        """Apply baseline subtraction to a single array."""
-        return samples - np.median(samples, axis=1, keepdims=True)
+        """Apply baseline subtraction to a single array.
+
+        The baseline is the upper median, the middle element of the sorted
+        row, which for an even number of ticks differs from np.median() in
+        not averaging the two middle elements.  Finding one element by
+        np.partition() is several times faster than np.median().
+
+        The result is float32 for float32 and small integer samples.
+        """
+        dtype = np.result_type(samples.dtype, np.float32)
+        k = samples.shape[1] // 2
+        median = np.partition(samples, k, axis=1)[:, k:k + 1].astype(dtype)
+        if samples.dtype.kind in 'fc':
+            # Partitioning sorts NaN last but, as np.median, NaN must win.
+            median[np.isnan(samples).any(axis=1)] = np.nan
+        out = np.empty(samples.shape, dtype)
+        return np.subtract(samples, median, out=out)
 
 
 class UnitNorm:
@@ -45,8 +60,15 @@ class UnitNorm:
         return self._normalize_single(data)
 
     def _normalize_single(self, samples):
-        """Normalize a single array to [0, 1]."""
+        """Normalize a single array to [0, 1].
+
+        As with Rebaseline, float32 and small integer samples give float32.
+        """
         data_min, data_max = np.nanmin(samples), np.nanmax(samples)
         if data_max > data_min:
-            return (samples - data_min) / (data_max - data_min)
+            # One output array, scaled in place.
+            out = np.subtract(samples, data_min,
+                              dtype=np.result_type(samples.dtype, np.float32))
+            out *= 1 / (data_max - data_min)
+            return out
         return np.zeros_like(samples)
@@ -1,5 +1,28 @@
+import threading
+from functools import lru_cache
+import numpy as np
 from qtpy import QtCore as qc
 
+
+@lru_cache(maxsize=None)
+def channel_range(num_channels):
+    """Return the synthetic channel numbers 0..num_channels-1.
+
+    The array is shared between calls and so is read-only.
+    """
+    channels = np.arange(num_channels)
+    channels.flags.writeable = False
+    return channels
+
+
+@lru_cache(maxsize=64)
+def tick_info(start, period, num_ticks):
+    """Return the shared, read-only tickinfo array [start, period, num_ticks]."""
+    tickinfo = np.array([start, period, num_ticks])
+    tickinfo.flags.writeable = False
+    return tickinfo
+
+
 class DataSource(qc.QObject):
     dataReady = qc.Signal(list)
     def __init__(self, index=0, name=None):
@@ -21,6 +44,56 @@ class DataSource(qc.QObject):
         return "base"
 
 
+class LoadWorker(qc.QObject):
+    """Run source loads, or other slow work, on a worker thread.
+
+    request() is given a function returning a list of parts (or None).  Only
+    the most recent request is run: any made while a load is in progress
+    replace each other.  The parts are emitted by done from the worker thread
+    and so reach receivers in the GUI thread as queued signals.
+
+    Without a QCoreApplication there is no event loop to deliver results so
+    requests are run immediately in the calling thread.
+    """
+    done = qc.Signal(list)
+    _wake = qc.Signal()
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._pending = None
+        self._thread = None
+        app = qc.QCoreApplication.instance()
+        if app is None:
+            return
+        self._thread = qc.QThread()
+        self.moveToThread(self._thread)
+        self._wake.connect(self._run)
+        app.aboutToQuit.connect(self._thread.quit)
+        app.aboutToQuit.connect(self._thread.wait)
+        self._thread.start()
+
+    def request(self, func):
+        if self._thread is None:
+            parts = func()
+            if parts is not None:
+                self.done.emit(parts)
+            return
+        with self._lock:
+            self._pending = func
+        self._wake.emit()
+
+    @qc.Slot()
+    def _run(self):
+        with self._lock:
+            func, self._pending = self._pending, None
+        if func is None:
+            return              # superseded request already run
+        parts = func()
+        if parts is not None:
+            self.done.emit(parts)
+
+
 class SourceManager(qc.QObject):
     """Manages multiple synchronized data sources."""
     dataReady = qc.Signal(list)
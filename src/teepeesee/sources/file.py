@@ -1,19 +1,20 @@
 
 import os
-import numpy as np
 from qtpy import QtCore as qc
 
 from .frame import FrameFileSource
 from .tensor import TensorFileSource
+from .npz import NpzFile
 
 class FileSource(qc.QObject):
     dataReady = qc.Signal(list)
 
-    def __init__(self, filenames, index=0, name=None):
+    def __init__(self, filenames, index=0, name=None, mmap=True):
         super().__init__()
         self.files = filenames
         self._index = index
         self._name = name
+        self._mmap = mmap
         self._delegate = None
         self._detect_and_create_delegate()
     
@@ -27,7 +28,7 @@ class FileSource(qc.QObject):
             return
         
         try:
-            with np.load(first_file) as data:
+            with NpzFile(first_file) as data:
                 keys = data.files
                 
                 # Check if this is a frame schema file
@@ -36,9 +37,9 @@ class FileSource(qc.QObject):
                 has_tickinfo_keys = any(k.startswith('tickinfo_') for k in keys)
                 
                 if has_frame_keys and has_channels_keys and has_tickinfo_keys:
-                    self._delegate = FrameFileSource(self.files, self._index, self._name)
+                    self._delegate = FrameFileSource(self.files, self._index, self._name, self._mmap)
                 else:
-                    self._delegate = TensorFileSource(self.files, self._index, self._name)
+                    self._delegate = TensorFileSource(self.files, self._index, self._name, self._mmap)
 
                 self._delegate.dataReady.connect(self.dataReady.emit)
                 
@@ -67,6 +68,10 @@ class FileSource(qc.QObject):
             return self._delegate.layer
         return 0
 
+    def _generate(self):
+        if self._delegate:
+            self._delegate._generate()
+
     @qc.Slot()
     def next(self):
         if self._delegate:
@@ -1,7 +1,9 @@
 import os
 from qtpy import QtCore as qc
 import re
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from .npz import NpzCache, read_in
+from .base import LoadWorker
 
 DETECTOR_MAP = {
     2560: {"name": "apa",    "splits": (800, 800, 960)},
@@ -10,35 +12,49 @@ DETECTOR_MAP = {
     960:  {"name": "apacol", "splits": (0, 0, 960)},
 }
 
+_FRAME_RE = re.compile(r"^frame_(?P<tag>.+)_(?P<num>\d+)$")
+
 
 class FrameFileSource(qc.QObject):
     dataReady = qc.Signal(list)
 
-    def __init__(self, filenames, index=0, name=None):
+    def __init__(self, filenames, index=0, name=None, mmap=True):
         super().__init__()
         self.files = filenames
         self.inventory = []
         self._index = index
         self._layer = 0
         self._name = name
+        self._npz = NpzCache('r' if mmap else None)
+        self._worker = LoadWorker()
+        self._worker.done.connect(self.dataReady)
         self._parse_files()
 
     def _parse_files(self):
-        pattern = re.compile(r"^frame_(?P<tag>.+)_(?P<num>\d+)$")
-        for f in self.files:
-            if not os.path.exists(f):
-                continue
-            try:
-                with np.load(f) as data:
-                    current_items = []
-                    for k in data.files:
-                        m = pattern.match(k)
-                        if m:
-                            current_items.append((f, m.group('tag'), m.group('num')))
-                    current_items.sort(key=lambda x: int(x[2]))
-                    self.inventory.extend(current_items)
-            except Exception as e:
-                print(f"Error indexing {f}: {e}")
+        # Files are independent and reading zip directories mostly waits on
+        # I/O so index them concurrently, keeping the order of self.files.
+        with ThreadPoolExecutor() as ex:
+            for items in ex.map(self._parse_file, self.files):
+                self.inventory.extend(items)
+
+    def _parse_file(self, f):
+        """Return the sorted inventory items of one file."""
+        current_items = []
+        if not os.path.exists(f):
+            return current_items
+        try:
+            # This opens and keeps the file for later use by _generate().
+            data = self._npz[f]
+            for k in data.files:
+                if not k.startswith('frame_'):
+                    continue
+                m = _FRAME_RE.match(k)
+                if m:
+                    current_items.append((f, m.group('tag'), m.group('num')))
+            current_items.sort(key=lambda x: int(x[2]))
+        except Exception as e:
+            print(f"Error indexing {f}: {e}")
+        return current_items
 
     @property
     def name(self):
@@ -60,29 +76,35 @@ class FrameFileSource(qc.QObject):
         return self._layer
 
     def _generate(self):
+        """Load the current frame in the background, emitting dataReady."""
+        self._worker.request(self._load)
+
+    def _load(self):
+        """Return the parts of the current frame.  Runs in the worker thread."""
         if not self.inventory:
             return
         fpath, tag, num = self.inventory[self._index]
         try:
-            with np.load(fpath) as data:
-                f_key, c_key, t_key = f"frame_{tag}_{num}", f"channels_{tag}_{num}", f"tickinfo_{tag}_{num}"
-                raw_frame, raw_chans, tick_info = data[f_key], data[c_key], data[t_key]
-
-                rows = raw_frame.shape[0]
-                det = DETECTOR_MAP.get(rows, {"name": "unknown", "splits": (rows, 0, 0)})
-                
-                parts, cursor = [], 0
-                for size in det['splits']:
-                    if size > 0:
-                        parts.append(dict(
-                            samples=raw_frame[cursor:cursor+size, :],
-                            channels=raw_chans[cursor:cursor+size],
-                            tickinfo=tick_info))
-                        cursor += size
-                    else:
-                        parts.append(None)
-                
-                self.dataReady.emit(parts)
+            data = self._npz[fpath]
+            f_key, c_key, t_key = f"frame_{tag}_{num}", f"channels_{tag}_{num}", f"tickinfo_{tag}_{num}"
+            raw_frame, raw_chans, tick_info = data[f_key], data[c_key], data[t_key]
+            read_in(raw_frame)
+
+            rows = raw_frame.shape[0]
+            det = DETECTOR_MAP.get(rows, {"name": "unknown", "splits": (rows, 0, 0)})
+            
+            parts, cursor = [], 0
+            for size in det['splits']:
+                if size > 0:
+                    parts.append(dict(
+                        samples=raw_frame[cursor:cursor+size, :],
+                        channels=raw_chans[cursor:cursor+size],
+                        tickinfo=tick_info))
+                    cursor += size
+                else:
+                    parts.append(None)
+            
+            return parts
         except Exception as e:
             print(f"Load error: {e}")
 
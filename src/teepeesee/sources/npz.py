@@ -0,0 +1,365 @@
+import os
+import struct
+import hashlib
+import functools
+import mmap
+import tempfile
+import zipfile
+import numpy as np
+
+# Where FlatStore keeps its files and, unless $TEEPEESEE_CACHE_MB says
+# otherwise, the most megabytes it keeps there.
+STORE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME')
+                         or os.path.expanduser('~/.cache'), 'teepeesee')
+STORE_MB = 2048
+
+
+@functools.lru_cache(maxsize=1)
+def store_mb():
+    """Return the most megabytes FlatStore keeps, from $TEEPEESEE_CACHE_MB.
+
+    This is read on first use, so a bad value only warns and can not stop
+    the program from starting.
+    """
+    value = os.environ.get('TEEPEESEE_CACHE_MB')
+    if value is None:
+        return STORE_MB
+    try:
+        return max(0, int(value))
+    except ValueError:
+        print(f"Ignoring TEEPEESEE_CACHE_MB={value!r}, not a whole number"
+              f" of megabytes, using {STORE_MB}")
+        return STORE_MB
+
+
+class FlatStore:
+    """Uncompressed copies of the arrays of one .npz file.
+
+    Each array is written to its own .npy file in directory the first time
+    it is put().  Later reads, also in later runs, are then a plain np.memmap
+    of the copy with no decompression.  File names hash the .npz path, size
+    and modification time and the array key so copies of a changed .npz file
+    are simply no longer found.
+
+    Copies are written to a temporary file and renamed into place so a
+    published copy is never modified and memmaps of it, in this or other
+    processes, stay valid.  Once directory holds more than max_mb megabytes,
+    by default store_mb(), the least recently used files are removed.
+    """
+
+    def __init__(self, filename, directory=STORE_DIR, max_mb=None):
+        st = os.stat(filename)
+        stamp = f'{os.path.abspath(filename)}:{st.st_size}:{st.st_mtime_ns}'
+        self._stem = hashlib.sha1(stamp.encode()).hexdigest()[:16]
+        self.directory = directory
+        self.max_size = (store_mb() if max_mb is None else max_mb) * 2**20
+
+    def _path(self, key):
+        name = hashlib.sha1(key.encode()).hexdigest()[:16]
+        return os.path.join(self.directory, f'{self._stem}-{name}.npy')
+
+    def get(self, key, mmap_mode='r'):
+        """Return memmap of a stored array or None if it is not stored."""
+        path = self._path(key)
+        try:
+            array = np.load(path, mmap_mode=mmap_mode, allow_pickle=False)
+            os.utime(path)      # recently used, see _evict()
+        except (OSError, ValueError):
+            return None
+        return array
+
+    def put(self, key, array, mmap_mode='r'):
+        """Store array and return its memmap.
+
+        The array itself is returned if it can not be stored.
+        """
+        if array.dtype.hasobject or array.size == 0:
+            return array
+        path = self._path(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+            try:
+                with os.fdopen(fd, 'wb') as fp:
+                    np.lib.format.write_array(fp, array, allow_pickle=False)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+            self._evict(path)
+        except OSError as e:
+            print(f"Not caching {key}: {e}")
+            return array
+        stored = self.get(key, mmap_mode)
+        return array if stored is None else stored
+
+    def _evict(self, keep):
+        """Remove least recently used files, other than keep, over max_size."""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(('.npy', '.tmp')):
+                    st = entry.stat()
+                    files.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_size:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)     # existing memmaps of it stay valid
+            except OSError:
+                continue            # eg removed by another process
+            total -= size
+
+
+def will_need(array, index):
+    """Advise the OS that array[index] of a memmap will soon be read.
+
+    The kernel then reads its pages in the background.  This does nothing
+    unless array is a C-ordered np.memmap and the platform has
+    posix_fadvise().
+    """
+    if not (isinstance(array, np.memmap) and array.filename
+            and array.flags.c_contiguous and hasattr(os, 'posix_fadvise')):
+        return
+    stride = array.strides[0]
+    fd = os.open(array.filename, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, array.offset + index * stride, stride,
+                         os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+def read_in(array):
+    """Read the pages of a memmap in now, in the calling thread.
+
+    Sources call this from their worker thread so that the disk reads of the
+    data they return are not left to its first use in the GUI thread.  One
+    byte of each page is read.  This does nothing unless array is a
+    contiguous np.memmap.
+    """
+    if not (isinstance(array, np.memmap) and array.size
+            and (array.flags.c_contiguous or array.flags.f_contiguous)):
+        return
+    raw = array.reshape(-1, order='A').view(np.uint8)
+    raw[::mmap.PAGESIZE].max()
+    raw[-1]
+
+
+# Zip end of central directory record and central directory file header.
+_EOCD = struct.Struct('<4s4H2LH')
+_CDIR = struct.Struct('<4s6H3L5H2L')
+
+
+def read_directory(fp):
+    """Return dict of member name to (header offset, compress type, size).
+
+    The size is that of the member's (possibly compressed) data.
+
+    This reads the zip central directory with a single read and struct,
+    which is much faster for archives of many members than building
+    zipfile's ZipInfo objects.  None is returned for archives this does not
+    handle (zip64 records, an archive comment or data before the archive),
+    which are best left to zipfile.
+    """
+    end = fp.seek(0, os.SEEK_END) - _EOCD.size
+    if end < 0:
+        return None
+    fp.seek(end)
+    sig, _, _, _, count, cd_size, cd_offset, comment = _EOCD.unpack(fp.read(_EOCD.size))
+    if (sig != zipfile.stringEndArchive or comment or count == 0xFFFF
+        or cd_offset + cd_size != end):
+        return None
+    fp.seek(cd_offset)
+    cd = fp.read(cd_size)
+    members = {}
+    pos = 0
+    for _ in range(count):
+        (sig, _, _, flags, method, _, _, _, csize, size,
+         nlen, elen, clen, _, _, _, offset) = _CDIR.unpack_from(cd, pos)
+        if sig != zipfile.stringCentralDir or 0xFFFFFFFF in (csize, size, offset):
+            return None
+        pos += _CDIR.size
+        name = cd[pos:pos + nlen].decode('utf-8' if flags & 0x800 else 'cp437')
+        pos += nlen + elen + clen
+        members[name] = (offset, method, csize)
+    return members
+
+
+class NpzFile:
+    """Read members of an .npz file while keeping the file open.
+
+    This mimics the part of the interface of np.load()'s NpzFile that the
+    sources use (.files, "in" and item access).  The member list comes from
+    read_directory().  Stored (uncompressed) .npy members are read by
+    seeking past their zip local file header and handing the file object
+    directly to numpy.  This skips the CRC-32 that zipfile otherwise
+    computes over every byte read.  Compressed members fall back to the
+    regular zipfile reader, only opened if needed.  Non-.npy members are
+    returned as bytes.
+
+    If mmap_mode is given (eg 'r') stored members are returned as np.memmap
+    so that only the pages actually touched are read from disk.  If a
+    FlatStore is also given then compressed members are decompressed into it
+    once and are then also returned as np.memmap.
+    """
+
+    def __init__(self, filename, mmap_mode=None, store=None):
+        self.filename = filename
+        self.mmap_mode = mmap_mode
+        self.store = store if mmap_mode else None
+        self.fp = open(filename, 'rb')
+        st = os.fstat(self.fp.fileno())
+        self.stamp = (st.st_size, st.st_mtime_ns)
+        self._zip = None
+        try:
+            members = read_directory(self.fp)
+        except (struct.error, UnicodeDecodeError):
+            members = None
+        if members is None:
+            members = {info.filename: (info.header_offset, info.compress_type,
+                                       info.compress_size)
+                       for info in self.zip.infolist()}
+        self._members = {}      # key -> (member name, header offset, compress type, size)
+        self._offsets = {}      # key -> offset of member data in file
+        for name, (offset, method, size) in members.items():
+            key = name[:-4] if name.endswith('.npy') else name
+            self._members[key] = (name, offset, method, size)
+        self.files = list(self._members)
+
+    @property
+    def zip(self):
+        """A zipfile.ZipFile of the file, opened on first use."""
+        if self._zip is None:
+            self._zip = zipfile.ZipFile(self.fp)
+        return self._zip
+
+    def __contains__(self, key):
+        return key in self._members
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def changed(self):
+        """Return True if the file's size or modification time changed."""
+        st = os.stat(self.filename)
+        return (st.st_size, st.st_mtime_ns) != self.stamp
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+        self.fp.close()
+
+    def _data_offset(self, key):
+        """Return the file offset to the data of a member."""
+        offset = self._offsets.get(key)
+        if offset is None:
+            header_offset = self._members[key][1]
+            fp = self.fp
+            fp.seek(header_offset)
+            header = fp.read(zipfile.sizeFileHeader)
+            # The local header's name and extra field lengths may differ
+            # from those in the central directory so must be read here.
+            nlen, elen = struct.unpack_from('<HH', header, 26)
+            offset = header_offset + zipfile.sizeFileHeader + nlen + elen
+            self._offsets[key] = offset
+        return offset
+
+    def will_need(self, key):
+        """Advise the OS that the bytes of member key will soon be read.
+
+        The kernel then reads them into its page cache in the background.
+        This does nothing if the platform has no posix_fadvise().
+        """
+        if not hasattr(os, 'posix_fadvise'):
+            return
+        start = self._data_offset(key)
+        # A member's bytes run up to the next member or, for the last, the
+        # central directory.  Length 0 advises to the end of the file.
+        later = [member[1] for member in self._members.values() if member[1] > start]
+        length = min(later) - start if later else 0
+        os.posix_fadvise(self.fp.fileno(), start, length, os.POSIX_FADV_WILLNEED)
+
+    def _memmap(self, fp):
+        """Return memmap of the .npy member whose header starts at fp."""
+        start = fp.tell()
+        version = np.lib.format.read_magic(fp)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(fp)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(fp)
+        if dtype.hasobject or 0 in shape:
+            # Nothing to map, let numpy deal with it.
+            fp.seek(start)
+            return np.lib.format.read_array(fp, allow_pickle=False)
+        return np.memmap(self.filename, dtype=dtype, mode=self.mmap_mode,
+                         shape=shape, order='F' if fortran else 'C',
+                         offset=fp.tell())
+
+    def __getitem__(self, key):
+        name, _, method, size = self._members[key]
+        if not name.endswith('.npy'):
+            if method == zipfile.ZIP_STORED:
+                # As for arrays, spare making a ZipFile just to read this.
+                self.fp.seek(self._data_offset(key))
+                return self.fp.read(size)
+            return self.zip.read(name)
+        if method == zipfile.ZIP_STORED:
+            fp = self.fp
+            fp.seek(self._data_offset(key))
+            if self.mmap_mode:
+                return self._memmap(fp)
+            return np.lib.format.read_array(fp, allow_pickle=False)
+        if self.store is not None:
+            array = self.store.get(key, self.mmap_mode)
+            if array is not None:
+                return array
+        with self.zip.open(name) as fp:
+            array = np.lib.format.read_array(fp, allow_pickle=False)
+        if self.store is not None:
+            return self.store.put(key, array, self.mmap_mode)
+        return array
+
+
+class NpzCache(dict):
+    """Map file names to NpzFile objects, opening each on first access.
+
+    With mmap_mode, compressed arrays are kept in a FlatStore under
+    store_dir of at most store_mb megabytes, by default store_mb(), unless
+    store_dir is None or store_mb is 0.
+    """
+
+    def __init__(self, mmap_mode=None, store_dir=STORE_DIR, store_mb=None):
+        super().__init__()
+        self.mmap_mode = mmap_mode
+        self.store_dir = store_dir
+        self.store_mb = store_mb
+
+    def __getitem__(self, filename):
+        """Return the NpzFile of filename, reopened if the file changed.
+
+        A file rewritten in place has its members at new offsets, so reading
+        it through the NpzFile opened before would give garbage.
+        """
+        npz = super().__getitem__(filename)
+        if npz.changed():
+            npz.close()
+            del self[filename]
+            npz = super().__getitem__(filename)
+        return npz
+
+    def __missing__(self, filename):
+        store = None
+        if self.mmap_mode and self.store_dir:
+            if self.store_mb is None:
+                self.store_mb = store_mb()
+            if self.store_mb:
+                store = FlatStore(filename, self.store_dir, self.store_mb)
+        npz = self[filename] = NpzFile(filename, self.mmap_mode, store)
+        return npz
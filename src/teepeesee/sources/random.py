@@ -1,6 +1,6 @@
 from qtpy import QtCore as qc
 import numpy as np
-from .base import DataSource
+from .base import DataSource, channel_range, tick_info
 
 class RandomDataSource(DataSource):
     def __init__(self, shapes, index=0, name=None):
@@ -17,13 +17,19 @@ class RandomDataSource(DataSource):
         outputs = []
         rng = np.random.default_rng(self._index)
         for h, w in self.shapes:
-            data = rng.normal(loc=100, scale=10, size=(h, w)).astype(np.float32)
-            for _ in range(rng.integers(1, 5)):
-                row = rng.integers(0, h)
-                data[row, :] += rng.uniform(20, 50)
+            # Sample directly in float32 and shift/scale in place to avoid
+            # a float64 temporary.
+            data = rng.standard_normal(size=(h, w), dtype=np.float32)
+            data *= 10
+            data += 100
+            # Add a few bright rows.  add.at() accumulates repeated rows.
+            nrows = int(rng.integers(1, 5))
+            rows = rng.integers(0, h, size=nrows)
+            amps = rng.uniform(20, 50, size=nrows).astype(np.float32)
+            np.add.at(data, rows, amps[:, None])
             outputs.append(dict(samples=data,
-                                channels=np.arange(data.shape[0]),
-                                tickinfo=np.array([0, 1, data.shape[1]])))
+                                channels=channel_range(h),
+                                tickinfo=tick_info(0, 1, w)))
         self.dataReady.emit(outputs)
 
     @qc.Slot()
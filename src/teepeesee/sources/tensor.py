@@ -1,44 +1,73 @@
 import os
 from qtpy import QtCore as qc
 import re
-import numpy as np
 import json
+from concurrent.futures import ThreadPoolExecutor
+from .npz import NpzCache, read_in, will_need
+from .base import LoadWorker, channel_range, tick_info
+
+_ARRAY_RE = re.compile(r"^tensor_(?P<index>\d+)_(?P<plane>\d+)_array$")
 
 class TensorFileSource(qc.QObject):
     dataReady = qc.Signal(list)
 
-    def __init__(self, filenames, index=0, name=None):
+    def __init__(self, filenames, index=0, name=None, mmap=True):
         super().__init__()
         self.files = filenames
         self.inventory = []  # List of (filepath, index) tuples
+        self._plane_index = {}  # (filepath, index) -> list of plane keys
         self._index = index
         self._layer = 0
         self._name = name
+        self._npz = NpzCache('r' if mmap else None)
+        self._planes_key = None     # (NpzFile, index) of self._planes
+        self._planes = []
+        self._metadata = {}         # (NpzFile, meta_key) -> parsed metadata
+        self._worker = LoadWorker()
+        self._worker.done.connect(self.dataReady)
         self._parse_files()
         print(f'TensorFileSource: {self.name}')
     
     def _parse_files(self):
         """Parse files and build inventory of unique INDEX values."""
-        array_pattern = re.compile(r"^tensor_(?P<index>\d+)_(?P<plane>\d+)_array$")
-        indices_set = set()
-        
-        for f in self.files:
-            if not os.path.exists(f):
-                print(f'no such file: {f}')
-                continue
-            try:
-                with np.load(f) as data:
-                    for k in data.files:
-                        #print(f'checking file: {k}')
-                        m = array_pattern.match(k)
-                        if m:
-                            idx = int(m.group('index'))
-                            indices_set.add((f, idx))
-            except Exception as e:
-                print(f"Error indexing {f}: {e}")
+        # Files are independent so index them concurrently.
+        with ThreadPoolExecutor() as ex:
+            for found in ex.map(self._parse_file, self.files):
+                self._plane_index.update(found)
+        # Keep planes in plane number order so loading need not sort them.
+        for planes in self._plane_index.values():
+            planes.sort()
         
         # Sort by index
-        self.inventory = sorted(list(indices_set), key=lambda x: x[1])
+        self.inventory = sorted(self._plane_index, key=lambda x: x[1])
+
+    def _parse_file(self, f):
+        """Return dict mapping (filepath, index) to its planes in one file.
+
+        Each plane is a tuple (plane_num, array_key, meta_key) with meta_key
+        None if the file has no metadata for the plane.
+        """
+        found = {}
+        if not os.path.exists(f):
+            print(f'no such file: {f}')
+            return found
+        try:
+            # This opens and keeps the file for later use by _generate().
+            data = self._npz[f]
+            for k in data.files:
+                if not k.startswith('tensor_'):
+                    continue
+                m = _ARRAY_RE.match(k)
+                if m:
+                    idx = int(m.group('index'))
+                    plane_num = int(m.group('plane'))
+                    meta_key = f"tensor_{idx}_{plane_num}_metadata.json"
+                    if meta_key not in data:
+                        meta_key = None
+                    found.setdefault((f, idx), []).append((plane_num, k, meta_key))
+        except Exception as e:
+            print(f"Error indexing {f}: {e}")
+        return found
 
     @property
     def name(self):
@@ -59,74 +88,96 @@ class TensorFileSource(qc.QObject):
     def layer(self):
         return self._layer
     
+    def _load_planes(self, fpath, target_index):
+        """Return sorted list of (plane_num, (array, metadata)) for an index.
+
+        Arrays are returned whole, 3D arrays with all their layers.  With
+        mmap these are np.memmap so nothing is read until sliced.  The planes
+        of the last index are kept so that a layer change only re-slices.
+        """
+        # A file that changed on disk is reopened as a new NpzFile, so keying
+        # on it drops what was kept from the old one.
+        data = self._npz[fpath]
+        if self._planes_key == (data, target_index):
+            return self._planes
+
+        # Collect arrays and metadata, already in plane order.
+        planes = []
+        for plane_num, array_key, meta_key in self._plane_index[(fpath, target_index)]:
+            array = data[array_key]
+            metadata = None
+            if meta_key:
+                # Metadata of an open file never changes so parse it only once.
+                metadata = self._metadata.get((data, meta_key))
+                if metadata is None:
+                    metadata = json.loads(data[meta_key])
+                    self._metadata[(data, meta_key)] = metadata
+            planes.append((plane_num, (array, metadata)))
+
+        self._planes_key = (data, target_index)
+        self._planes = planes
+        return self._planes
+
     def _generate(self):
-        """Load all planes for the current index and create separate parts."""
+        """Load the current index in the background, emitting dataReady."""
+        self._worker.request(self._load)
+
+    def _load(self):
+        """Return one part per plane of the current index and layer.
+
+        This runs in the worker thread.
+        """
         if not self.inventory:
             return
         
         fpath, target_index = self.inventory[self._index]
         
         try:
-            with np.load(fpath) as data:
-                # Find all arrays and metadata for this index
-                array_pattern = re.compile(r"^tensor_(?P<index>\d+)_(?P<plane>\d+)_array$")
-                
-                # Collect arrays and metadata by plane
-                planes_data = {}  # plane_num -> (array, metadata)
-                
-                for k in data.files:
-                    array_match = array_pattern.match(k)
-                    if array_match and int(array_match.group('index')) == target_index:
-                        plane_num = int(array_match.group('plane'))
-                        array = data[k]
-
-                        # Handle 3D arrays by using the layer property
-                        if array.ndim == 3:
-                            # Clip layer to valid range
-                            layer_idx = min(self._layer, array.shape[0] - 1)
-                            layer_idx = max(0, layer_idx)
-                            array = array[layer_idx, :, :]
-
-                        # Find corresponding metadata
-                        meta_key = f"tensor_{target_index}_{plane_num}_metadata.json"
-                        metadata = None
-                        if meta_key in data.files:
-                            metadata = json.loads(data[meta_key].decode())
-
-                        planes_data[plane_num] = (array, metadata)
-                
-                # Sort by plane number
-                sorted_planes = sorted(planes_data.items())
-                
-                if not sorted_planes:
-                    return
-                
-                # Create parts list with one part per plane
-                parts = []
-                for plane_num, (array, metadata) in sorted_planes:
-                    # Generate synthetic channels
-                    num_channels = array.shape[0]
-                    channels = np.arange(num_channels)
-                    
-                    # Extract tickinfo from metadata
-                    if metadata and 'time' in metadata and 'period' in metadata:
-                        time_start = metadata['time']
-                        period = metadata['period']
-                        num_ticks = array.shape[1]
-                        tickinfo = np.array([time_start, period, num_ticks])
-                    else:
-                        # Default tickinfo
-                        num_ticks = array.shape[1]
-                        tickinfo = np.array([0, 1, num_ticks])
-                    
-                    parts.append(dict(
-                        samples=array,
-                        channels=channels,
-                        tickinfo=tickinfo
-                    ))
+            sorted_planes = self._load_planes(fpath, target_index)
+            
+            if not sorted_planes:
+                return
+            
+            # Create parts list with one part per plane
+            parts = []
+            for plane_num, (array, metadata) in sorted_planes:
+                # Handle 3D arrays by using the layer property.  This is a
+                # view so for a memmap only this layer is read from disk.
+                if array.ndim == 3:
+                    # Clip layer to valid range
+                    layer_idx = min(self._layer, array.shape[0] - 1)
+                    layer_idx = max(0, layer_idx)
+                    # Layers are usually stepped through in turn so have
+                    # the neighbours read ahead.
+                    for near in (layer_idx - 1, layer_idx + 1):
+                        if 0 <= near < array.shape[0]:
+                            will_need(array, near)
+                    array = array[layer_idx, :, :]
+                read_in(array)
+
+                # Generate synthetic channels
+                num_channels = array.shape[0]
+                channels = channel_range(num_channels)
                 
-                self.dataReady.emit(parts)
+                # Extract tickinfo from metadata
+                if metadata and 'time' in metadata and 'period' in metadata:
+                    time_start = metadata['time']
+                    period = metadata['period']
+                    num_ticks = array.shape[1]
+                    tickinfo = tick_info(time_start, period, num_ticks)
+                else:
+                    # Default tickinfo
+                    num_ticks = array.shape[1]
+                    tickinfo = tick_info(0, 1, num_ticks)
                 
+                parts.append(dict(
+                    samples=array,
+                    channels=channels,
+                    tickinfo=tickinfo
+                ))
+            
+            return parts
+            
         except Exception as e:
             print(f"Load error: {e}")
             import traceback
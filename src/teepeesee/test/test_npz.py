@@ -0,0 +1,168 @@
+import io
+import os
+import json
+import zipfile
+import numpy as np
+import pytest
+from teepeesee.sources.npz import (FlatStore, NpzCache, NpzFile, read_directory,
+                                   store_mb, STORE_MB)
+
+
+def arrays():
+    rng = np.random.default_rng(42)
+    frame = rng.normal(size=(30, 50)).astype(np.float32)
+    return dict(frame_a_0=frame,
+                channels_a_0=np.arange(30),
+                fortran=np.asfortranarray(rng.integers(0, 100, size=(7, 11))),
+                empty=np.zeros((0, 5), dtype=np.int16),
+                scalar=np.array(3.5))
+
+
+def check(npz, expected):
+    assert npz.files == list(expected)
+    for key, array in expected.items():
+        assert key in npz
+        got = npz[key]
+        assert got.dtype == array.dtype
+        assert got.shape == array.shape
+        assert np.isfortran(got) == np.isfortran(array)
+        np.testing.assert_array_equal(got, array)
+
+
+@pytest.mark.parametrize('save', [np.savez, np.savez_compressed])
+@pytest.mark.parametrize('mmap_mode', [None, 'r'])
+def test_members(tmp_path, save, mmap_mode):
+    path = tmp_path / 'x.npz'
+    save(path, **arrays())
+    with open(path, 'rb') as fp:
+        assert read_directory(fp) is not None
+    with NpzFile(path, mmap_mode) as npz:
+        check(npz, arrays())
+        if mmap_mode and save is np.savez:
+            assert isinstance(npz['frame_a_0'], np.memmap)
+
+
+def test_zip64(tmp_path, monkeypatch):
+    path = tmp_path / 'x.npz'
+    # Make zipfile write zip64 records for all but the smallest archives.
+    with monkeypatch.context() as m:
+        m.setattr(zipfile, 'ZIP64_LIMIT', 100)
+        np.savez(path, **arrays())
+    with open(path, 'rb') as fp:
+        assert read_directory(fp) is None
+    with NpzFile(path, 'r') as npz:
+        check(npz, arrays())
+
+
+def test_comment(tmp_path):
+    path = tmp_path / 'x.npz'
+    np.savez(path, **arrays())
+    with zipfile.ZipFile(path, 'a') as zf:
+        zf.comment = b'made by a test'
+    with open(path, 'rb') as fp:
+        assert read_directory(fp) is None
+    with NpzFile(path, 'r') as npz:
+        check(npz, arrays())
+
+
+def test_prefixed(tmp_path):
+    buf = io.BytesIO()
+    np.savez(buf, **arrays())
+    path = tmp_path / 'x.npz'
+    path.write_bytes(b'#!/bin/sh\nexit 0\n' + buf.getvalue())
+    with open(path, 'rb') as fp:
+        assert read_directory(fp) is None
+    for mmap_mode in (None, 'r'):
+        with NpzFile(path, mmap_mode) as npz:
+            check(npz, arrays())
+
+
+@pytest.mark.parametrize('compression', [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+def test_json_members(tmp_path, compression):
+    path = tmp_path / 'x.npz'
+    metadata = dict(time=0.0, period=500.0)
+    array = np.ones((4, 6), dtype=np.float32)
+    with zipfile.ZipFile(path, 'w', compression) as zf:
+        with zf.open('tensor_0_0_array.npy', 'w') as fp:
+            np.lib.format.write_array(fp, array)
+        zf.writestr('tensor_0_0_metadata.json', json.dumps(metadata))
+    with NpzFile(path, 'r') as npz:
+        assert npz.files == ['tensor_0_0_array', 'tensor_0_0_metadata.json']
+        np.testing.assert_array_equal(npz['tensor_0_0_array'], array)
+        assert json.loads(npz['tensor_0_0_metadata.json']) == metadata
+        # Only compressed members need zipfile.
+        assert (npz._zip is None) == (compression == zipfile.ZIP_STORED)
+
+
+@pytest.mark.parametrize('mmap_mode', [None, 'r'])
+def test_cache_reopen(tmp_path, mmap_mode):
+    path = tmp_path / 'x.npz'
+    np.savez(path, frame_a_0=np.zeros((4, 5)))
+    cache = NpzCache(mmap_mode, None)
+    npz = cache[path]
+    assert cache[path] is npz
+    # Rewritten in place, with members of another size.
+    with open(path, 'r+b') as fp:
+        np.savez(fp, frame_a_0=np.ones((6, 5)))
+    os.utime(path, ns=(1, 1))
+    assert cache[path] is not npz
+    np.testing.assert_array_equal(cache[path]['frame_a_0'], np.ones((6, 5)))
+
+
+def test_store(tmp_path):
+    path = tmp_path / 'x.npz'
+    np.savez_compressed(path, **arrays())
+    store_dir = tmp_path / 'store'
+    check(NpzCache('r', store_dir)[path], arrays())
+    # Compressed arrays now come from the store.
+    store = FlatStore(path, store_dir)
+    for key, array in arrays().items():
+        got = store.get(key)
+        if array.size:
+            assert isinstance(got, np.memmap)
+            np.testing.assert_array_equal(got, array)
+            assert np.isfortran(got) == np.isfortran(array)
+        else:
+            assert got is None
+
+
+def test_store_stamp(tmp_path):
+    path = tmp_path / 'x.npz'
+    frame = arrays()['frame_a_0']
+    np.savez_compressed(path, frame_a_0=frame)
+    store_dir = tmp_path / 'store'
+    held = NpzCache('r', store_dir)[path]['frame_a_0']
+    assert isinstance(held, np.memmap)
+    assert FlatStore(path, store_dir).get('frame_a_0') is not None
+
+    # A changed file no longer finds the copies of its old content.
+    np.savez_compressed(path, frame_a_0=frame + 1)
+    os.utime(path, ns=(1, 1))
+    assert FlatStore(path, store_dir).get('frame_a_0') is None
+    np.testing.assert_array_equal(NpzCache('r', store_dir)[path]['frame_a_0'], frame + 1)
+    # The memmap of the old copy is left intact.
+    np.testing.assert_array_equal(held, frame)
+
+
+def test_store_evict(tmp_path):
+    store = FlatStore(__file__, tmp_path, max_mb=1)
+    array = np.zeros(2**16, dtype=np.float32)   # a quarter megabyte
+    for key in 'abcde':
+        store.put(key, array)
+    assert store.get('a') is None
+    assert store.get('e') is not None
+    assert len(os.listdir(tmp_path)) == 3
+
+
+@pytest.mark.parametrize('value, megabytes', [(None, STORE_MB), ('100', 100), ('0', 0),
+                                              ('2G', STORE_MB), ('', STORE_MB)])
+def test_store_mb(monkeypatch, value, megabytes):
+    if value is None:
+        monkeypatch.delenv('TEEPEESEE_CACHE_MB', raising=False)
+    else:
+        monkeypatch.setenv('TEEPEESEE_CACHE_MB', value)
+    store_mb.cache_clear()
+    try:
+        assert store_mb() == megabytes
+    finally:
+        store_mb.cache_clear()